@@ -1,12 +1,19 @@
 import hashlib
 import os
+import json
+import functools
 from typing import Iterable
 import shutil
 import subprocess
+import numpy as np
 
 from .logger import logger
 
 
+AUDIO_SAMPLE_RATE = 48000
+AUDIO_CHANNELS = 2
+
+
 def ffmpeg_suitability(path):
     try:
         version = subprocess.run([path, "-version"], check=True,
@@ -52,6 +59,12 @@ else:
         else:
             ffmpeg_path = max(ffmpeg_paths, key=ffmpeg_suitability)
 
+ffprobe_path = shutil.which("ffprobe")
+if ffprobe_path is None and ffmpeg_path is not None:
+    # ffprobe usually ships next to ffmpeg, imageio_ffmpeg only bundles ffmpeg itself
+    ffprobe_path = shutil.which(os.path.basename(ffmpeg_path).replace("ffmpeg", "ffprobe", 1),
+                                path=os.path.dirname(ffmpeg_path))
+
 
 def get_sorted_dir_files_from_directory(directory: str, skip_first_images: int=0, select_every_nth: int=1, extensions: Iterable=None):
     directory = directory.strip()
@@ -89,14 +102,76 @@ def calculate_file_hash(filename: str, hash_every_n: int = 1):
     return h.hexdigest()
 
 
+def fast_file_sig(filename: str, head_size: int = 64*1024):
+    # size, mtime and a hash of the first 64 KiB: tells edited files apart without reading
+    # whole (possibly multi-GB) videos on every graph execution
+    st = os.stat(filename)
+    with open(filename, 'rb') as f:
+        head_sha1 = hashlib.sha1(f.read(head_size)).hexdigest()
+    return f"{st.st_size}-{st.st_mtime_ns}-{head_sha1}"
+
+
 def get_audio(file, start_time=0, duration=0):
+    # Returns int16 pcm samples shaped (samples, AUDIO_CHANNELS) at AUDIO_SAMPLE_RATE.
+    # Raw pcm has a known size per second, so with a duration the samples are read
+    # straight into a preallocated buffer instead of a wav file in one large bytes object.
     args = [ffmpeg_path, "-v", "error", "-i", file]
     if start_time > 0:
         args += ["-ss", str(start_time)]
     if duration > 0:
         args += ["-t", str(duration)]
-    return subprocess.run(args + ["-f", "wav", "-"],
-                          stdout=subprocess.PIPE, check=True).stdout
+    args += ["-vn", "-f", "s16le", "-acodec", "pcm_s16le",
+             "-ar", str(AUDIO_SAMPLE_RATE), "-ac", str(AUDIO_CHANNELS), "-"]
+
+    if duration <= 0:
+        audio = subprocess.run(args, stdout=subprocess.PIPE, check=True).stdout
+        audio = np.frombuffer(audio, dtype=np.int16)
+        return audio[:len(audio) - len(audio) % AUDIO_CHANNELS].reshape(-1, AUDIO_CHANNELS)
+
+    buf = np.empty((int(duration * AUDIO_SAMPLE_RATE), AUDIO_CHANNELS), dtype=np.int16)
+    view = memoryview(buf.reshape(-1)).cast("B")
+    bytes_read = 0
+    with subprocess.Popen(args, stdout=subprocess.PIPE) as proc:
+        while bytes_read < len(view):
+            n = proc.stdout.readinto(view[bytes_read:])
+            if not n:
+                break
+            bytes_read += n
+        if bytes_read < len(view):
+            if proc.wait() != 0:
+                raise subprocess.CalledProcessError(proc.returncode, args)
+        else:
+            # rounding can leave a few samples past the expected size, they are not needed
+            proc.kill()
+    return buf[:bytes_read // buf.itemsize // AUDIO_CHANNELS]
+
+
+@functools.lru_cache(maxsize=32)
+def _probe_dims(path, mtime_ns):
+    result = subprocess.run([ffprobe_path, "-v", "error", "-select_streams", "v:0",
+                             "-show_entries", "stream=width,height,r_frame_rate,nb_frames:format=duration",
+                             "-of", "json", path],
+                            capture_output=True, check=True)
+    info = json.loads(result.stdout)
+    stream = info["streams"][0]
+
+    num, den = stream["r_frame_rate"].split("/")
+    fps = float(num) / float(den) if float(den) else 0.0
+    frame_count = stream.get("nb_frames", "N/A")
+    if frame_count.isnumeric():
+        frame_count = int(frame_count)
+    else:
+        # some containers (webm, mkv) don't store the frame count
+        duration = info.get("format", {}).get("duration", "N/A")
+        frame_count = int(float(duration) * fps) if duration != "N/A" else 0
+    return (fps, int(stream["width"]), int(stream["height"]), frame_count)
+
+
+def probe_dims(path):
+    # (fps, width, height, frame_count) of the first video stream, read from the container
+    # headers without decoding. Memoized per file version, urls are probed once per process.
+    mtime_ns = os.stat(path).st_mtime_ns if os.path.isfile(path) else None
+    return _probe_dims(path, mtime_ns)
 
 
 def lazy_eval(func):
@@ -121,7 +196,7 @@ def hash_path(path):
         return "input"
     if is_url(path):
         return "url"
-    return calculate_file_hash(path.strip("\""))
+    return fast_file_sig(path.strip("\""))
 
 
 def validate_path(path, allow_none=False, allow_url=True):
@@ -2,21 +2,37 @@ from pytube import YouTube
 from pytube.exceptions import VideoUnavailable
 import cv2
 import os
+import json
+import hashlib
+import functools
 from pathlib import Path
-from PIL import Image, ImageOps
 from typing import Tuple, Dict, List, Any, Union
 import numpy as np
+from PIL import Image
 
 import torch
 import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import folder_paths
-from comfy.utils import common_upscale
 
 from .logger import logger
-from .utils import calculate_file_hash, validate_path, lazy_eval, hash_path
+from .utils import calculate_file_hash, fast_file_sig, validate_path, lazy_eval, hash_path, ffmpeg_path, ffprobe_path, probe_dims
+
+try:
+    import av
+except ImportError:
+    logger.warn("Failed to import av, falling back to cv2 for video decoding")
+    av = None
+
+try:
+    import decord
+except ImportError:
+    decord = None
 
 
 video_extensions = ['webm', 'mp4', 'mkv', 'gif']
+video_extensions_set = frozenset(video_extensions)
 force_sizes = ["Disabled", "256x?", "?x256", "256x256", "512x?", "?x512", "512x512", "?x768", "768x?"]
 
 COMMON_REQUIRED_INPUTS = {
@@ -34,6 +50,23 @@ EMPTY_VIDEO_INPUTS = {
     "fps": ("INT", {"default": 10, "min": 1, "max": 1000, "step": 1}),
 }
 
+DECODE_WORKERS = min(4, os.cpu_count() or 1)
+MIN_FRAMES_PER_WORKER = 16
+# total size of the decoded frames cache on disk
+FRAMES_CACHE_MAX_BYTES = 4 * 1024 ** 3
+# a single writer keeps cache writes off the node's critical path and serializes eviction
+frames_cache_writer = ThreadPoolExecutor(max_workers=1)
+
+@functools.lru_cache(maxsize=32)
+def list_input_videos(input_dir, mtime_ns) -> tuple:
+    # INPUT_TYPES is queried often by the ui, only rescan when the directory's mtime changes
+    files = []
+    for f in os.listdir(input_dir):
+        if os.path.splitext(f)[1][1:].lower() in video_extensions_set and os.path.isfile(os.path.join(input_dir, f)):
+            files.append(f)
+    return tuple(sorted(files))
+
+
 def target_size(width, height, force_size) -> tuple[int, int]:
     if force_size != "Disabled":
         force_size = force_size.split("x")
@@ -53,37 +86,135 @@ def target_size(width, height, force_size) -> tuple[int, int]:
     return (width, height)
 
 
-def frame_to_tensor(frame) -> torch.Tensor:
-    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    # convert frame to comfyui's expected format (taken from comfy's load image code)
-    image = Image.fromarray(frame)
-    image = ImageOps.exif_transpose(image)
-    image = np.array(image, dtype=np.float32) / 255.0
-    image = torch.from_numpy(image)[None,] 
-    return image
+def decoder_backend() -> str:
+    if decord is not None:
+        return "decord"
+    if av is not None:
+        return "av"
+    return "cv2"
 
-def process_video_cap(
-        video_cap,
+
+def frames_cache_path(video, *args) -> str:
+    # decoded frames only depend on the file contents and the decode arguments
+    key = "|".join(str(x) for x in (fast_file_sig(video), *args))
+    key = hashlib.sha1(key.encode()).hexdigest()
+    # ComfyUI wipes its temp directory on startup and exit, keep the cache next to it instead
+    return os.path.join(folder_paths.base_path, "komojini_cache", "frames", key)
+
+
+def load_cached_frames(cache_path):
+    try:
+        with open(cache_path + ".json") as f:
+            fps = json.load(f)["fps"]
+        frames = np.load(cache_path + ".npy", mmap_mode="r")
+        # mtime marks the entry as recently used for evict_cached_frames
+        os.utime(cache_path + ".npy")
+    except (OSError, ValueError, KeyError):
+        return None
+    logger.debug(f"Loaded cached frames: {cache_path}")
+    return (frames, fps)
+
+
+def evict_cached_frames(cache_dir, needed_bytes):
+    # drop least recently used entries until needed_bytes fits in FRAMES_CACHE_MAX_BYTES
+    entries = []
+    for f in os.listdir(cache_dir):
+        if f.endswith(".npy") and not f.endswith(".tmp.npy"):
+            st = os.stat(os.path.join(cache_dir, f))
+            entries.append((st.st_mtime_ns, st.st_size, os.path.join(cache_dir, f[:-len(".npy")])))
+    entries.sort()
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total + needed_bytes <= FRAMES_CACHE_MAX_BYTES:
+            break
+        for ext in (".json", ".npy"):
+            if os.path.exists(path + ext):
+                os.remove(path + ext)
+        total -= size
+
+
+def save_cached_frames(cache_path, frames, fps):
+    if frames.nbytes > FRAMES_CACHE_MAX_BYTES:
+        return
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        evict_cached_frames(cache_dir, frames.nbytes)
+        # write to temporary files first so a partial write is never picked up as a hit
+        np.save(cache_path + ".tmp.npy", frames)
+        os.replace(cache_path + ".tmp.npy", cache_path + ".npy")
+        with open(cache_path + ".tmp.json", "w") as f:
+            json.dump({"fps": fps}, f)
+        os.replace(cache_path + ".tmp.json", cache_path + ".json")
+    except OSError as e:
+        logger.warning(f"Failed to cache decoded frames: {e}")
+
+
+def center_crop(old_width, old_height, width, height) -> tuple[int, int]:
+    # Same crop offsets as common_upscale's "center" mode
+    old_aspect = old_width / old_height
+    new_aspect = width / height
+    x, y = 0, 0
+    if old_aspect > new_aspect:
+        x = round((old_width - old_width * (new_aspect / old_aspect)) / 2)
+    elif old_aspect < new_aspect:
+        y = round((old_height - old_height * (old_aspect / new_aspect)) / 2)
+    return (x, y)
+
+
+def resize_frame(frame, width, height, dst=None) -> np.ndarray:
+    # PIL lanczos over the center crop, the same resampling as common_upscale(..., "lanczos", "center").
+    # Every decoder goes through here, so force_size output doesn't depend on the backend.
+    old_height, old_width = frame.shape[:2]
+    x, y = center_crop(old_width, old_height, width, height)
+    image = Image.fromarray(frame).resize((width, height), Image.Resampling.LANCZOS,
+                                          box=(x, y, old_width - x, old_height - y))
+    if dst is None:
+        return np.asarray(image)
+    dst[...] = np.asarray(image)
+    return dst
+
+
+def copy_frame(frame, dst):
+    # Decoders write straight into the output buffer, resizing on the way if force_size is set
+    if frame.shape == dst.shape:
+        dst[...] = frame
+    else:
+        resize_frame(frame, dst.shape[1], dst.shape[0], dst=dst)
+
+
+def resize_frames(frames, width, height) -> np.ndarray:
+    # Resize the uint8 NHWC frames before the float conversion, so no NCHW round-trip
+    # (movedim) is needed.
+    out = np.empty((len(frames), height, width, frames.shape[-1]), dtype=frames.dtype)
+    for i, frame in enumerate(frames):
+        resize_frame(frame, width, height, dst=out[i])
+    return out
+
+
+def calculate_frame_range(
+        fps,
+        frame_count,
         start_sec,
         end_sec,
         frame_load_cap,
         max_fps = None,
     ):
-    fps = int(video_cap.get(cv2.CAP_PROP_FPS))
-    width, height = int(video_cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    frame_count = int(video_cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
     if not frame_load_cap or frame_load_cap <= 0:
         frame_load_cap = 999999
 
     if not end_sec:
         end_sec = frame_count / fps
 
-    # Calculate the total number of frames in the specified time range
-    video_sec = end_sec - start_sec
-    original_frame_length = int(video_sec * fps)
+    # Calculate the frame range [start_frame, end_frame) with integer arithmetic only
+    start_frame = int(round(fps * start_sec))
+    end_frame = int(round(fps * end_sec))
+    if frame_count > 0:
+        end_frame = min(end_frame, frame_count)
+    total_to_scan = max(end_frame - start_frame, 0)
 
-    step = max(original_frame_length // frame_load_cap, 1)
+    step = max(total_to_scan // frame_load_cap, 1)
     new_fps = fps // step
 
     if max_fps and 0 < max_fps < new_fps:
@@ -91,44 +222,275 @@ def process_video_cap(
             logger.warning(f"Warning | new_fps: {new_fps}, max_fps: {max_fps}, modified step: int({step / max_fps * new_fps})")
         step = int(step / max_fps * new_fps)
         new_fps = max_fps
-        
 
-    start_frame = fps * start_sec
-    end_frame = fps * end_sec
+    n_expected = min(frame_load_cap, len(range(0, total_to_scan, step)))
 
-    frames_added = 0
-    images = []
+    logger.info(f"start_frame: {start_frame}\nend_frame: {end_frame}\nstep: {step}\n")
 
-    curr_frame = start_frame
+    return (start_frame, total_to_scan, step, n_expected, new_fps)
 
-    logger.info(f"start_frame: {start_frame}\nend_frame: {end_frame}\nstep: {step}\n")
 
-    while True:
-        # Set the frame position
-        int_curr_frame = int(curr_frame)
+def frames_to_images(frames) -> torch.Tensor:
+    # convert RGB uint8 frames to comfyui's expected format (float32 NHWC in [0, 1], as IMAGE
+    # requires) in one pass over the whole batch; decoding, resizing and caching stay in uint8.
+    # the cast to float32 happens inside the multiply, straight into the output tensor's storage
+    images = torch.empty(frames.shape, dtype=torch.float32)
+    np.multiply(frames, np.float32(1.0 / 255.0), out=images.numpy(), dtype=np.float32)
+    return images
+
 
-        video_cap.set(cv2.CAP_PROP_POS_FRAMES, int_curr_frame)
+def read_frames_cap(video_cap, buf, start_frame, step) -> int:
+    # Seeking with CAP_PROP_POS_FRAMES rewinds to the nearest keyframe and decodes forward,
+    # so seek only once and read the rest of the range sequentially.
+    video_cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
 
+    frames_added = 0
+    i = 0
+    while frames_added < len(buf):
+        if (i % step) != 0:
+            # grab() decodes without the BGR conversion and copy that read()'s retrieve() does
+            if not video_cap.grab():
+                break
+            i += 1
+            continue
         ret, frame = video_cap.read()
         if not ret:
             break
-
-        # Append the frame to the frames list
-        image = frame_to_tensor(frame)
-        images.append(image)
+        copy_frame(frame, buf[frames_added])
         frames_added += 1
+        i += 1
+    return frames_added
 
-        # if cap exists and we've reached it, stop processing frames
-        if frame_load_cap > 0 and frames_added >= frame_load_cap:
-            break
-        if curr_frame >= end_frame:
-            break
 
-        curr_frame += step
-    
+def read_video_segment(video, buf, start_frame, step) -> int:
+    # every worker needs its own capture, cv2.VideoCapture is not thread safe
+    video_cap = cv2.VideoCapture(video)
+    try:
+        return read_frames_cap(video_cap, buf, start_frame, step)
+    finally:
+        video_cap.release()
+
+
+def process_video_cap(
+        video_cap,
+        start_sec,
+        end_sec,
+        frame_load_cap,
+        max_fps = None,
+        video = None,
+        force_size = "Disabled",
+    ):
+    fps = int(video_cap.get(cv2.CAP_PROP_FPS))
+    width, height = int(video_cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_count = int(video_cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width, height = target_size(width, height, force_size)
+
+    start_frame, total_to_scan, step, n_expected, new_fps = calculate_frame_range(
+        fps, frame_count, start_sec, end_sec, frame_load_cap, max_fps,
+    )
+
+    # Raw BGR uint8 frames
+    buf = np.empty((n_expected, height, width, 3), dtype=np.uint8)
+
+    workers = min(DECODE_WORKERS, n_expected // MIN_FRAMES_PER_WORKER) if video else 1
+    if workers > 1:
+        # cv2 releases the GIL while decoding, so contiguous segments can be decoded concurrently
+        bounds = [n_expected * k // workers for k in range(workers + 1)]
+        segments = list(zip(bounds[:-1], bounds[1:]))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(read_video_segment, video, buf[a:b], start_frame + a * step, step)
+                for a, b in segments
+            ]
+            counts = [future.result() for future in futures]
+
+        # a short segment means the video ended early, anything after it would leave a gap
+        frames_added = 0
+        for (a, b), count in zip(segments, counts):
+            frames_added = a + count
+            if count < b - a:
+                break
+    else:
+        frames_added = read_frames_cap(video_cap, buf, start_frame, step)
+
+    # viewing the frames as one tall image lets cvtColor swap channels in a single call
+    frames = buf[:frames_added]
+    if frames_added > 0:
+        cv2.cvtColor(frames.reshape(-1, width, 3), cv2.COLOR_BGR2RGB, dst=frames.reshape(-1, width, 3))
+
     #Setup lambda for lazy audio capture
     #audio = lambda : get_audio(video, skip_first_frames * target_frame_time, frame_load_cap*target_frame_time)
-    return (images, frames_added, new_fps, width, height)
+    return (frames, frames_added, new_fps, width, height)
+
+
+def process_video_av(
+        video,
+        start_sec,
+        end_sec,
+        frame_load_cap,
+        max_fps = None,
+        force_size = "Disabled",
+    ):
+    with av.open(video) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+
+        rate = float(stream.average_rate or stream.guessed_rate)
+        fps = int(rate)
+        width, height = target_size(stream.codec_context.width, stream.codec_context.height, force_size)
+        frame_count = stream.frames
+        if not frame_count and container.duration:
+            frame_count = int(container.duration / av.time_base * rate)
+
+        start_frame, total_to_scan, step, n_expected, new_fps = calculate_frame_range(
+            fps, frame_count, start_sec, end_sec, frame_load_cap, max_fps,
+        )
+
+        # Frame numbers are counted from the first pts of the stream, like cv2's CAP_PROP_POS_FRAMES
+        start_pts = stream.start_time or 0
+        if start_frame > 0:
+            container.seek(start_pts + int(start_frame / rate / stream.time_base), stream=stream)
+
+        frames_added = 0
+        buf = np.empty((n_expected, height, width, 3), dtype=np.uint8)
+
+        for frame in container.decode(stream):
+            if frame.pts is None:
+                continue
+            i = round(float((frame.pts - start_pts) * stream.time_base) * rate) - start_frame
+            if i >= total_to_scan:
+                break
+            if i < 0 or (i % step) != 0:
+                continue
+
+            copy_frame(frame.to_ndarray(format="rgb24"), buf[frames_added])
+            frames_added += 1
+
+            if frames_added >= n_expected:
+                break
+
+    return (buf[:frames_added], frames_added, new_fps, width, height)
+
+
+def process_video_decord(
+        video,
+        start_sec,
+        end_sec,
+        frame_load_cap,
+        max_fps = None,
+        force_size = "Disabled",
+    ):
+    vr = decord.VideoReader(video, ctx=decord.cpu(0))
+    fps = int(vr.get_avg_fps())
+    frame_count = len(vr)
+
+    start_frame, total_to_scan, step, n_expected, new_fps = calculate_frame_range(
+        fps, frame_count, start_sec, end_sec, frame_load_cap, max_fps,
+    )
+
+    # slice the range before materializing it so the list is created at its final size
+    indices = list(range(start_frame, start_frame + total_to_scan, step)[:n_expected])
+    if not indices:
+        return (np.empty((0, 0, 0, 3), dtype=np.uint8), 0, new_fps, 0, 0)
+
+    # decord seeks and decodes the whole batch in C++ and returns RGB frames
+    frames = vr.get_batch(indices).asnumpy()
+    height, width = frames.shape[1:3]
+    if force_size != "Disabled":
+        new_size = target_size(width, height, force_size)
+        if new_size[0] != width or new_size[1] != height:
+            frames = resize_frames(frames, new_size[0], new_size[1])
+            width, height = new_size
+    return (frames, len(frames), new_fps, width, height)
+
+
+def probe_video_cv(video):
+    video_cap = cv2.VideoCapture(video)
+    try:
+        if not video_cap.isOpened():
+            raise ValueError(f"{video} could not be loaded with cv.")
+        fps = int(video_cap.get(cv2.CAP_PROP_FPS))
+        width, height = int(video_cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        frame_count = int(video_cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        video_cap.release()
+    return (fps, width, height, frame_count)
+
+
+def probe_video(video):
+    if ffprobe_path is not None:
+        try:
+            fps, width, height, frame_count = probe_dims(video)
+            return (int(fps), width, height, frame_count)
+        except (subprocess.CalledProcessError, KeyError, IndexError, ValueError) as e:
+            logger.warning(f"ffprobe failed for {video}, probing with cv2: {e}")
+    return probe_video_cv(video)
+
+
+def process_video_ffmpeg(
+        video,
+        start_sec,
+        end_sec,
+        frame_load_cap,
+        max_fps = None,
+        force_size = "Disabled",
+    ):
+    fps, width, height, frame_count = probe_video(video)
+
+    start_frame, total_to_scan, step, n_expected, new_fps = calculate_frame_range(
+        fps, frame_count, start_sec, end_sec, frame_load_cap, max_fps,
+    )
+
+    # force_size is applied per frame with resize_frame, like the other decoders,
+    # so only one full-size frame is staged at a time
+    new_width, new_height = target_size(width, height, force_size)
+    staging = None
+    if new_width != width or new_height != height:
+        staging = np.empty((height, width, 3), dtype=np.uint8)
+        width, height = new_width, new_height
+
+    buf = np.empty((n_expected, height, width, 3), dtype=np.uint8)
+    if n_expected == 0:
+        return (buf, 0, new_fps, width, height)
+
+    args = [ffmpeg_path, "-v", "error"]
+    if start_frame > 0:
+        args += ["-ss", str(start_frame / fps)]
+    args += ["-i", video, "-an", "-vf", f"select=not(mod(n\\,{step}))", "-vsync", "0",
+             "-frames:v", str(n_expected), "-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+
+    frames_added = 0
+
+    # ffmpeg decodes while we copy raw frames from its stdout straight into the buffer.
+    # stderr goes to a file, a pipe nobody drains would block ffmpeg once it fills up.
+    with tempfile.TemporaryFile() as stderr, subprocess.Popen(args, stdout=subprocess.PIPE, stderr=stderr) as proc:
+        try:
+            while frames_added < n_expected:
+                target = buf[frames_added] if staging is None else staging
+                frame = memoryview(target.reshape(-1))
+                bytes_read = 0
+                while bytes_read < len(frame):
+                    n = proc.stdout.readinto(frame[bytes_read:])
+                    if not n:
+                        break
+                    bytes_read += n
+                if bytes_read < len(frame):
+                    break
+                if staging is not None:
+                    resize_frame(staging, width, height, dst=buf[frames_added])
+                frames_added += 1
+
+            if frames_added < n_expected:
+                # stdout ended early, the exit code tells a short video from a failed read
+                if proc.wait() != 0:
+                    stderr.seek(0)
+                    message = stderr.read().decode("utf-8", errors="replace").strip()
+                    raise RuntimeError(f"ffmpeg exited with code {proc.returncode} after {frames_added} frames: {message}")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+
+    return (buf[:frames_added], frames_added, new_fps, width, height)
 
 
 def load_video_cv(
@@ -142,27 +504,39 @@ def load_video_cv(
         **kwargs,
     ) -> Tuple[torch.Tensor, int, int, int, int]:
 
-    video_cap = None
-    try:
-        video_cap = cv2.VideoCapture(video)
-        if not video_cap.isOpened():
-            raise ValueError(f"{video} could not be loaded with cv.")
-        images, frames_added, fps, width, height = process_video_cap(video_cap, start_sec, end_sec, frame_load_cap, max_fps)
-    
-    finally:
-        if video_cap:
-            video_cap.release()
-    if len(images) == 0:
+    # only local files can be hashed for the decoded frames cache
+    cache_path = None
+    if os.path.isfile(video):
+        # backends select and resize frames differently, so each gets its own entries
+        cache_path = frames_cache_path(video, decoder_backend(), start_sec, end_sec, frame_load_cap, max_fps, force_size)
+    cached = load_cached_frames(cache_path) if cache_path else None
+
+    if cached is not None:
+        frames, fps = cached
+        frames_added = len(frames)
+        height, width = frames.shape[1:3]
+    else:
+        if decoder_backend() == "decord":
+            frames, frames_added, fps, width, height = process_video_decord(video, start_sec, end_sec, frame_load_cap, max_fps, force_size)
+        elif decoder_backend() == "av":
+            frames, frames_added, fps, width, height = process_video_av(video, start_sec, end_sec, frame_load_cap, max_fps, force_size)
+        else:
+            video_cap = None
+            try:
+                video_cap = cv2.VideoCapture(video)
+                if not video_cap.isOpened():
+                    raise ValueError(f"{video} could not be loaded with cv.")
+                frames, frames_added, fps, width, height = process_video_cap(video_cap, start_sec, end_sec, frame_load_cap, max_fps, video=video, force_size=force_size)
+
+            finally:
+                if video_cap:
+                    video_cap.release()
+        if cache_path and frames_added > 0:
+            frames_cache_writer.submit(save_cached_frames, cache_path, frames, fps)
+
+    if frames_added == 0:
         raise RuntimeError("No frames generated")
-    images = torch.cat(images, dim=0)
-    if force_size != "Disabled":
-        new_size = target_size(width, height, force_size)
-
-        if new_size[0] != width or new_size[1] != height:
-            s = images.movedim(-1,1)
-            s = common_upscale(s, new_size[0], new_size[1], "lanczos", "center")
-            images = s.movedim(1,-1)
-            width, height = new_size
+    images = frames_to_images(frames)
 
     # TODO: raise an error maybe if no frames were loaded?
 
@@ -177,18 +551,6 @@ def is_gif(filename) -> bool:
     return str(filename).endswith("gif")
 
 
-def get_audio(file, start_time=0, duration=0):
-    # TODO: set ffmpeg_path
-    ffmpeg_path = ""
-    args = [ffmpeg_path, "-v", "error", "-i", file]
-    if start_time > 0:
-        args += ["-ss", str(start_time)]
-    if duration > 0:
-        args += ["-t", str(duration)]
-    return subprocess.run(args + ["-f", "wav", "-"],
-                          stdout=subprocess.PIPE, check=True).stdout
-
-
 def download_youtube_video(
         youtube_url: str,
         start_sec: float,
@@ -199,39 +561,39 @@ def download_youtube_video(
         max_fps = None,
         **kwargs,
     ):
-    if not output_dir:
-        output_dir = os.path.join(folder_paths.output_directory, "youtube")
-
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir, exist_ok=True)
-
-    cap = None 
-
-    try:
-        yt = YouTube(youtube_url)
-        stream = yt.streams.filter(progressive=True, file_extension='mp4').order_by('resolution').desc().first()
-
-        video_path = stream.download(output_dir)
-
-        cap = cv2.VideoCapture(video_path)
-        images, frames_added, fps, width, height = process_video_cap(cap, start_sec, end_sec, frame_load_cap, max_fps)
-    
-    finally:
-        # Release the video capture object
-        if cap:
-            cap.release()
+    yt = YouTube(youtube_url)
+    stream = yt.streams.filter(progressive=True, file_extension='mp4').order_by('resolution').desc().first()
+
+    if ffmpeg_path is not None:
+        # decode straight from the stream url, overlapping the download with decoding
+        frames, frames_added, fps, width, height = process_video_ffmpeg(stream.url, start_sec, end_sec, frame_load_cap, max_fps, force_size)
+    else:
+        if not output_dir:
+            output_dir = os.path.join(folder_paths.output_directory, "youtube")
+
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+
+        cap = None 
+
+        try:
+            # name the download after the url and stream so later runs can reuse a complete file
+            filename = hashlib.sha1(f"{youtube_url}{stream.itag}".encode()).hexdigest() + ".mp4"
+            video_path = os.path.join(output_dir, filename)
+            if not (os.path.exists(video_path) and os.path.getsize(video_path) == stream.filesize):
+                video_path = stream.download(output_dir, filename=filename)
+
+            cap = cv2.VideoCapture(video_path)
+            frames, frames_added, fps, width, height = process_video_cap(cap, start_sec, end_sec, frame_load_cap, max_fps, video=video_path, force_size=force_size)
+        
+        finally:
+            # Release the video capture object
+            if cap:
+                cap.release()
     
-    if len(images) == 0:
+    if frames_added == 0:
         raise RuntimeError("No frames generated")
-    images = torch.cat(images, dim=0)
-
-    if force_size != "Disabled":
-        new_size = target_size(width, height, force_size)        
-        if new_size[0] != width or new_size[1] != height:
-            s = images.movedim(-1,1)
-            s = common_upscale(s, new_size[0], new_size[1], "lanczos", "center")
-            images = s.movedim(1,-1)
-            width, height = new_size
+    images = frames_to_images(frames)
 
     #Setup lambda for lazy audio capture
     #audio = lambda : get_audio(video, skip_first_frames * target_frame_time, frame_load_cap*target_frame_time)
@@ -260,6 +622,10 @@ class YouTubeVideoLoader:
     def load_video(self, **kwargs):
         return download_youtube_video(**kwargs)
 
+    @classmethod
+    def IS_CHANGED(s, youtube_url, **kwargs):
+        return hashlib.sha1(youtube_url.encode()).hexdigest()
+
 
 class UltimateVideoLoader:
     source = [
@@ -272,19 +638,14 @@ class UltimateVideoLoader:
     @classmethod
     def INPUT_TYPES(cls):
         input_dir = folder_paths.get_input_directory()
-        files = []
-        for f in os.listdir(input_dir):
-            if os.path.isfile(os.path.join(input_dir, f)):
-                file_parts = f.split('.')
-                if len(file_parts) > 1 and (file_parts[-1] in video_extensions):
-                    files.append(f)
+        files = list_input_videos(input_dir, os.stat(input_dir).st_mtime_ns)
         
         inputs = {
             "required": {
                 "source": (cls.source,),
                 "youtube_url": ("STRING", {"default": "youtube/url/here"}),
                 "video": ("STRING", {"default": "X://insert/path/here.mp4", "path_extensions": video_extensions}),
-                "upload": (sorted(files),),
+                "upload": (list(files),),
             }
         }
 
@@ -316,20 +677,20 @@ class UltimateVideoLoader:
         logger.debug(f"loaded video images.shape: {images.shape}, frames_count: {frames_count}, fpe: {fps}, widthxheight: {width}x{height}")
         return (images, frames_count, fps, width, height,)
 
-    # @classmethod
-    # def IS_CHANGED(s, upload, **kwargs):
-    #     logger.debug(f"is_changed | source: {source}")
-
-    #     source = kwargs.get("source")
-    #     if source == "filepath":
-    #         video = kwargs.get("video")
-    #         return hash_path(video)
-    #     elif source == "fileupload":
-    #         image_path = folder_paths.get_annotated_filepath(upload)
-    #         return calculate_file_hash(image_path)
-    #     else:
-    #         youtube_url = kwargs.get("youtube_url")
-    #         return hash_path(youtube_url)
+    @classmethod
+    def IS_CHANGED(s, source, upload, video, youtube_url, **kwargs):
+        logger.debug(f"is_changed | source: {source}")
+
+        if source == "filepath":
+            if validate_path(video) is not True:
+                return ""
+            return hash_path(video)
+        elif source == "fileupload":
+            image_path = folder_paths.get_annotated_filepath(upload.strip("\""))
+            return fast_file_sig(image_path)
+        elif source == "YouTube":
+            return hashlib.sha1(youtube_url.encode()).hexdigest()
+        return ""
         
     # @classmethod
     # def VALIDATE_INPUTS(s, video, force_size, **kwargs):
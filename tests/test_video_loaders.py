@@ -0,0 +1,80 @@
+import importlib
+import os
+import stat
+import sys
+import textwrap
+import threading
+import types
+
+import pytest
+
+for module in ("cv2", "numpy", "torch", "pytube", "folder_paths"):
+    pytest.importorskip(module)
+
+NODES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nodes")
+
+
+@pytest.fixture(scope="module")
+def video_loaders():
+    # load nodes/video_loaders.py without nodes/__init__.py, which pulls in the ComfyUI node graph
+    package = types.ModuleType("komojini_nodes")
+    package.__path__ = [NODES_DIR]
+    sys.modules.setdefault("komojini_nodes", package)
+    return importlib.import_module("komojini_nodes.video_loaders")
+
+
+def fake_ffmpeg(tmp_path, stderr_bytes, frames, frame_size, returncode=0):
+    script = tmp_path / "ffmpeg"
+    script.write_text(textwrap.dedent(f"""\
+        #!{sys.executable}
+        import sys
+        sys.stderr.buffer.write(b"e" * {stderr_bytes})
+        sys.stderr.flush()
+        for _ in range({frames}):
+            sys.stdout.buffer.write(b"\\x80" * {frame_size})
+        sys.stdout.flush()
+        sys.exit({returncode})
+    """))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+
+def run_with_timeout(func, timeout=30):
+    result = {}
+
+    def target():
+        try:
+            result["value"] = func()
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "process_video_ffmpeg hung"
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+def test_ffmpeg_large_stderr_does_not_hang(video_loaders, tmp_path, monkeypatch):
+    width, height, frame_count = 16, 8, 4
+    monkeypatch.setattr(video_loaders, "ffmpeg_path", fake_ffmpeg(tmp_path, 256 * 1024, frame_count, width * height * 3))
+    monkeypatch.setattr(video_loaders, "probe_video", lambda video: (10, width, height, frame_count))
+
+    frames, frames_added, fps, w, h = run_with_timeout(
+        lambda: video_loaders.process_video_ffmpeg("stream", 0, 0, frame_count)
+    )
+
+    assert frames_added == frame_count
+    assert frames.shape == (frame_count, height, width, 3)
+    assert (frames == 0x80).all()
+
+
+def test_ffmpeg_failure_raises_with_stderr(video_loaders, tmp_path, monkeypatch):
+    width, height = 16, 8
+    monkeypatch.setattr(video_loaders, "ffmpeg_path", fake_ffmpeg(tmp_path, 256 * 1024, 0, width * height * 3, returncode=1))
+    monkeypatch.setattr(video_loaders, "probe_video", lambda video: (10, width, height, 4))
+
+    with pytest.raises(RuntimeError, match="exited with code 1"):
+        run_with_timeout(lambda: video_loaders.process_video_ffmpeg("stream", 0, 0, 4))